@@ -1,17 +1,34 @@
-from fastapi import FastAPI, Response
-from pydantic import BaseModel
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import ORJSONResponse
 from typing import Dict, Any, Optional, Union
+from typing_extensions import Annotated
 import logging
 import httpx
+import msgspec
+import orjson
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
-
 AIARCHIVE_SERVER_BASE_URL = "http://10.0.1.157:3000"
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One shared client so archive calls reuse pooled keep-alive connections
+    app.state.http = httpx.AsyncClient(
+        base_url=AIARCHIVE_SERVER_BASE_URL,
+        timeout=30.0,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+    )
+    try:
+        yield
+    finally:
+        await app.state.http.aclose()
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+
 # MCP error codes
 MCP_ERRORS = {
     "PARSE_ERROR": -32700,
@@ -21,34 +38,51 @@ MCP_ERRORS = {
     "INTERNAL_ERROR": -32603,
 }
 
+# Integer ids are limited to int64 so orjson can always encode them back
+# into replies (msgspec bounds can't go past int64 either)
+MIN_INT_ID = -(2**63)
+MAX_INT_ID = 2**63 - 1
+
 # Request model
-class MCPRequest(BaseModel):
+class MCPRequest(msgspec.Struct):
     jsonrpc: str
     method: str
     params: Optional[Dict[str, Any]] = None
-    id: Optional[Union[str, int]] = None
+    id: Optional[Union[str, Annotated[int, msgspec.Meta(ge=MIN_INT_ID, le=MAX_INT_ID)]]] = None
+
+_REQUEST_DECODER = msgspec.json.Decoder(MCPRequest)
 
 # Tool implementations
 def add_tool(args: Dict[str, Any]) -> str:
-    if "a" not in args or "b" not in args:
-        raise ValueError("Missing parameters: a and b")
-    if not isinstance(args["a"], (int, float)) or not isinstance(args["b"], (int, float)):
+    try:
+        a = args["a"]
+        b = args["b"]
+    except KeyError as e:
+        raise ValueError(f"Missing parameter: {e.args[0]}")
+    # Exact type checks, so JSON booleans are not accepted as ints
+    ta, tb = type(a), type(b)
+    if (ta is not int and ta is not float) or (tb is not int and tb is not float):
         raise ValueError("Parameters a and b must be numbers")
-    return f"Result: {args['a'] + args['b']}"
+    return str(a + b)
 
 def reverse_tool(args: Dict[str, Any]) -> str:
     if "text" not in args:
         raise ValueError("Missing parameter: text")
     if not isinstance(args["text"], str):
         raise ValueError("Parameter text must be a string")
-    return f"Result: {args['text'][::-1]}"
+    return args["text"][::-1]
 
 def multiply_tool(args: Dict[str, Any]) -> str:
-    if "a" not in args or "b" not in args:
-        raise ValueError("Missing parameters: a and b")
-    if not isinstance(args["a"], (int, float)) or not isinstance(args["b"], (int, float)):
+    try:
+        a = args["a"]
+        b = args["b"]
+    except KeyError as e:
+        raise ValueError(f"Missing parameter: {e.args[0]}")
+    # Exact type checks, so JSON booleans are not accepted as ints
+    ta, tb = type(a), type(b)
+    if (ta is not int and ta is not float) or (tb is not int and tb is not float):
         raise ValueError("Parameters a and b must be numbers")
-    return f"Result: {args['a'] * args['b']}"
+    return str(a * b)
 
 async def save_conversation_tool(args: Dict[str, Any]) -> str:
     if "conversation" not in args:
@@ -60,43 +94,37 @@ async def save_conversation_tool(args: Dict[str, Any]) -> str:
         raise ValueError("Parameter conversation must be a string")
     
     try:
-        async with httpx.AsyncClient() as client:
-            # Create multipart form data
-            files = {
+        # Create multipart form data
+        files = {
             'htmlDoc': ('conversation.txt', conversation_content.encode('utf-8'), 'text/plain')
-            }
-            data = {
-                'model': 'Claude (MCP)',
-                'skipScraping': ''
-            }
-            
-            # Make request to existing API endpoint
-            response = await client.post(
-                f"{AIARCHIVE_SERVER_BASE_URL}/api/conversation",
-                files=files,
-                data=data,
-                timeout=30.0
-            )
+        }
+        data = {
+            'model': 'Claude (MCP)',
+            'skipScraping': ''
+        }
+        
+        # Make request to existing API endpoint
+        response = await app.state.http.post("/api/conversation", files=files, data=data)
+        
+        if response.status_code == 201:
+            result = response.json()
+            return f"Conversation saved successfully! View it at: {result.get('url', 'N/A')}"
+        else:
+            error_msg = response.text
+            raise ValueError(f"API request failed: {response.status_code} - {error_msg}")
             
-            if response.status_code == 201:
-                result = response.json()
-                return f"Conversation saved successfully! View it at: {result.get('url', 'N/A')}"
-            else:
-                error_msg = response.text
-                raise ValueError(f"API request failed: {response.status_code} - {error_msg}")
-                
     except httpx.RequestError as e:
         raise ValueError(f"Failed to connect to scraper server: {str(e)}")
     except Exception as e:
         raise ValueError(f"Error saving conversation: {str(e)}")
 
 
-# Tool registry
+# Tool registry: name -> (function, is_async)
 TOOLS = {
-    "add": add_tool,
-    "reverse": reverse_tool,
-    "multiply": multiply_tool,
-    "save_conversation": save_conversation_tool
+    "add": (add_tool, False),
+    "reverse": (reverse_tool, False),
+    "multiply": (multiply_tool, False),
+    "save_conversation": (save_conversation_tool, True)
 }
 
 # Tool schemas
@@ -156,107 +184,149 @@ TOOL_SCHEMAS = [
     }
 ]
 
+# Tool schemas are static, so encode them once and keep the name/description
+# summary for GET /mcp alongside
+TOOL_SCHEMAS_JSON = orjson.dumps(TOOL_SCHEMAS)
+TOOL_SUMMARIES = [{"name": tool["name"], "description": tool["description"]} for tool in TOOL_SCHEMAS]
+
+# Pre-serialized results for the static methods; only the JSON-RPC
+# envelope around them is built per call
+_INITIALIZE_RESULT = orjson.dumps({
+    "protocolVersion": "2025-06-18",
+    "capabilities": {"tools": {}},
+    "serverInfo": {"name": "Python MCP Server", "version": "1.0.0"}
+})
+_TOOLS_LIST_RESULT = b'{"tools":' + TOOL_SCHEMAS_JSON + b'}'
+
+def render_result(req_id: Any, result: bytes) -> Response:
+    content = b'{"jsonrpc":"2.0","id":' + orjson.dumps(req_id) + b',"result":' + result + b'}'
+    return Response(content=content, media_type="application/json")
+
+# Shared reply for notifications; reusable since it has no body or background tasks
+_NO_CONTENT = Response(status_code=204)
+
+# Method handlers
+async def handle_initialize(req_id: Any, params: Any):
+    logger.debug("Initialize")
+    return render_result(req_id, _INITIALIZE_RESULT)
+
+async def handle_tools_list(req_id: Any, params: Any):
+    logger.debug("List tools")
+    return render_result(req_id, _TOOLS_LIST_RESULT)
+
+async def handle_tools_call(req_id: Any, params: Any):
+    try:
+        tool_name = params["name"]
+        tool_args = params["arguments"]
+    except (KeyError, TypeError):
+        return {
+            "jsonrpc": "2.0",
+            "id": req_id,
+            "error": {"code": MCP_ERRORS["INVALID_PARAMS"], "message": "Missing name/arguments"}
+        }
+    
+    logger.debug("Call tool: %s with %s", tool_name, tool_args)
+    
+    try:
+        tool, is_async = TOOLS[tool_name]
+    except (KeyError, TypeError):
+        return {
+            "jsonrpc": "2.0",
+            "id": req_id,
+            "error": {"code": MCP_ERRORS["METHOD_NOT_FOUND"], "message": f"Unknown tool: {tool_name}"}
+        }
+    
+    try:
+        result = await tool(tool_args) if is_async else tool(tool_args)
+            
+        return {
+            "jsonrpc": "2.0",
+            "id": req_id,
+            "result": {"content": [{"type": "text", "text": result}]}
+        }
+    except Exception as e:
+        return {
+            "jsonrpc": "2.0",
+            "id": req_id,
+            "error": {"code": MCP_ERRORS["INVALID_PARAMS"], "message": str(e)}
+        }
+
+# Method registry
+METHOD_HANDLERS = {
+    "initialize": handle_initialize,
+    "tools/list": handle_tools_list,
+    "tools/call": handle_tools_call
+}
+
 @app.post("/mcp")
-async def mcp_endpoint(request: MCPRequest):
+async def mcp_endpoint(request: Request):
     """MCP protocol endpoint"""
-    logger.info(f"MCP Request: {request.model_dump()}")
+    try:
+        req = _REQUEST_DECODER.decode(await request.body())
+    except msgspec.ValidationError as e:
+        return {
+            "jsonrpc": "2.0",
+            "id": None,
+            "error": {"code": MCP_ERRORS["INVALID_REQUEST"], "message": f"Invalid request: {e}"}
+        }
+    except msgspec.DecodeError:
+        return {
+            "jsonrpc": "2.0",
+            "id": None,
+            "error": {"code": MCP_ERRORS["PARSE_ERROR"], "message": "Parse error"}
+        }
+    
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("MCP Request: %s", req)
+    
+    req_id = req.id
+    method = req.method
+    params = req.params
     
     try:
         # Handle notifications (no id field)
-        if request.id is None and request.method:
-            logger.info(f"Notification: {request.method}")
-            return Response(status_code=204)
+        if req_id is None and method:
+            logger.debug("Notification: %s", method)
+            return _NO_CONTENT
         
         # Validate JSON-RPC format
-        if request.jsonrpc != "2.0":
+        if req.jsonrpc != "2.0":
             return {
                 "jsonrpc": "2.0",
-                "id": request.id,
+                "id": req_id,
                 "error": {"code": MCP_ERRORS["INVALID_REQUEST"], "message": "Invalid jsonrpc"}
             }
         
         # Handle method calls
-        if request.method == "initialize":
-            logger.info("Initialize")
-            return {
-                "jsonrpc": "2.0",
-                "id": request.id,
-                "result": {
-                    "protocolVersion": "2025-06-18",
-                    "capabilities": {"tools": {}},
-                    "serverInfo": {"name": "Python MCP Server", "version": "1.0.0"}
-                }
-            }
-        
-        elif request.method == "tools/list":
-            logger.info("List tools")
+        handler = METHOD_HANDLERS.get(method)
+        if handler is None:
             return {
                 "jsonrpc": "2.0",
-                "id": request.id,
-                "result": {"tools": TOOL_SCHEMAS}
+                "id": req_id,
+                "error": {"code": MCP_ERRORS["METHOD_NOT_FOUND"], "message": f"Method not found: {method}"}
             }
         
-        elif request.method == "tools/call":
-            if not request.params or "name" not in request.params or "arguments" not in request.params:
-                return {
-                    "jsonrpc": "2.0",
-                    "id": request.id,
-                    "error": {"code": MCP_ERRORS["INVALID_PARAMS"], "message": "Missing name/arguments"}
-                }
-            
-            tool_name = request.params["name"]
-            tool_args = request.params["arguments"]
-            
-            logger.info(f"Call tool: {tool_name} with {tool_args}")
-            
-            if tool_name not in TOOLS:
-                return {
-                    "jsonrpc": "2.0",
-                    "id": request.id,
-                    "error": {"code": MCP_ERRORS["METHOD_NOT_FOUND"], "message": f"Unknown tool: {tool_name}"}
-                }
-            
-            try:
-                # Handle async tools
-                if tool_name == "save_conversation":
-                    result = await TOOLS[tool_name](tool_args)
-                else:
-                    result = TOOLS[tool_name](tool_args)
-                    
-                return {
-                    "jsonrpc": "2.0",
-                    "id": request.id,
-                    "result": {"content": [{"type": "text", "text": result}]}
-                }
-            except Exception as e:
-                return {
-                    "jsonrpc": "2.0",
-                    "id": request.id,
-                    "error": {"code": MCP_ERRORS["INVALID_PARAMS"], "message": str(e)}
-                }
-        
-        else:
-            return {
-                "jsonrpc": "2.0",
-                "id": request.id,
-                "error": {"code": MCP_ERRORS["METHOD_NOT_FOUND"], "message": f"Method not found: {request.method}"}
-            }
+        return await handler(req_id, params)
             
     except Exception as e:
         logger.error(f"Server error: {e}")
         return {
             "jsonrpc": "2.0",
-            "id": request.id,
+            "id": req_id,
             "error": {"code": MCP_ERRORS["INTERNAL_ERROR"], "message": str(e)}
         }
 
+# Static GET responses, serialized once at import
+_HEALTH_BYTES = orjson.dumps({"status": "healthy", "server": "Python MCP Server"})
+_MCP_INFO_BYTES = orjson.dumps({
+    "message": "MCP Server running",
+    "tools": TOOL_SUMMARIES
+})
+
 @app.get("/health")
 async def health():
-    return {"status": "healthy", "server": "Python MCP Server"}
+    return Response(_HEALTH_BYTES, media_type="application/json")
 
 @app.get("/mcp")
 async def mcp_info():
-    return {
-        "message": "MCP Server running",
-        "tools": [{"name": tool["name"], "description": tool["description"]} for tool in TOOL_SCHEMAS]
-    }
\ No newline at end of file
+    return Response(_MCP_INFO_BYTES, media_type="application/json")
\ No newline at end of file